@@ -1,7 +1,12 @@
+import os
 from flask import Flask
 from flask_cors import CORS
 
-def create_app():
+def create_app(use_reloader=False):
+    """
+    Build the app. Pass use_reloader=True when it will be served by the
+    Werkzeug debug reloader, whose parent process only watches for changes.
+    """
     app = Flask(__name__, 
                 static_folder='../../static',
                 template_folder='../../templates')
@@ -11,10 +16,16 @@ def create_app():
     app.config['JSON_SORT_KEYS'] = False
     
     # Register blueprints
-    from .routes import main_bp, CustomJSONEncoder
+    from .routes import main_bp, ORJSONProvider, init_crime_data
     
-    # Use custom JSON encoder to handle NaN, Infinity values
-    app.json_encoder = CustomJSONEncoder
+    # Serialize JSON with orjson, which also handles NaN, Infinity and numpy values
+    app.json = ORJSONProvider(app)
+    
+    # Load the data and build its lookups and cached responses before serving,
+    # so no request pays for the load. Under the reloader only the child
+    # process that serves requests loads it
+    if not use_reloader or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        init_crime_data()
     
     app.register_blueprint(main_bp)
     
@@ -1,11 +1,60 @@
 import pandas as pd
 import numpy as np
 from sklearn.cluster import DBSCAN
-from sklearn.preprocessing import StandardScaler
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.inspection import permutation_importance
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
+from sklearn.metrics import accuracy_score, log_loss, make_scorer
 from datetime import datetime
+from functools import lru_cache
+from joblib import Memory
+import hashlib
+import os
+from .jit import njit
+
+# GPU DBSCAN is used when RAPIDS cuML is available
+try:
+    from cuml.cluster import DBSCAN as cuDBSCAN
+except ImportError:
+    cuDBSCAN = None
+
+# Text columns stored as pandas categoricals so filters and counts run on integer codes
+CATEGORICAL_COLUMNS = ['Primary Type', 'Description', 'Location Description']
+
+# Hotspot radius for clustering, in kilometres
+EARTH_RADIUS_KM = 6371.0
+CLUSTER_EPS_KM = 0.5
+
+# Trained arrest models are cached on disk, keyed by a fingerprint of their
+# training data. The cache is unpickled on load, so it lives in the app's own
+# data directory rather than a shared temporary one
+MODEL_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'model_cache')
+_model_cache = Memory(os.path.normpath(MODEL_CACHE_DIR), verbose=0)
+MODEL_CACHE_MAX_ITEMS = 64
+
+# Largest reported trend change, in percent, in either direction
+MAX_TREND_CHANGE = 40.0
+
+# Random generator for the jitter added to fallback trend estimates, seeded once
+_trend_rng = np.random.default_rng(42)
+
+def optimize_dtypes(df):
+    """
+    Convert text columns to categoricals holding only the values present and
+    Year to int16, in place. Columns that are already converted are left as is.
+    """
+    for col in CATEGORICAL_COLUMNS:
+        if col not in df.columns:
+            continue
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.remove_unused_categories()
+        else:
+            df[col] = df[col].astype('category')
+    
+    if 'Year' in df.columns and pd.api.types.is_integer_dtype(df['Year']) and df['Year'].dtype != np.int16:
+        df['Year'] = df['Year'].astype(np.int16)
+    
+    return df
 
 def perform_cluster_analysis(df, crime_type=None):
     """
@@ -18,61 +67,89 @@ def perform_cluster_analysis(df, crime_type=None):
     Returns:
         Dictionary with cluster information
     """
-    # Extract coordinates for clustering
-    coords = df[['Latitude', 'Longitude']].dropna().values
+    # Extract coordinates for clustering, skipping rows with a missing value
+    lat = df['Latitude'].to_numpy(dtype=np.float64)
+    lon = df['Longitude'].to_numpy(dtype=np.float64)
+    rows = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
     
     # Limit to max 10,000 points for performance
-    if len(coords) > 10000:
-        # Use random sample for better performance
-        np.random.seed(42)  # For reproducibility
-        indices = np.random.choice(len(coords), size=10000, replace=False)
-        coords = coords[indices]
-    
-    # Standardize coordinates for more accurate clustering
-    coords_scaled = StandardScaler().fit_transform(coords)
-    
-    # Parameters tuned for better performance with Chicago data
-    # Smaller eps and min_samples for faster clustering
-    db = DBSCAN(eps=0.1, min_samples=30, algorithm='ball_tree', n_jobs=-1).fit(coords_scaled)
-    labels = db.labels_
-    
-    # Number of clusters (excluding noise points with label -1)
-    n_clusters = len(set(labels)) - (1 if -1 in labels else 0)
+    if len(rows) > 10000:
+        # Use random sample for better performance (seeded for reproducibility)
+        rng = np.random.default_rng(42)
+        rows = rows[rng.choice(len(rows), size=10000, replace=False, shuffle=False)]
+    
+    # Gather only the selected rows into one contiguous (n, 2) array and
+    # convert it to radians in place; no separate scaled copy is made
+    coords = np.column_stack([lat[rows], lon[rows]])
+    np.radians(coords, out=coords)
+    
+    # Identical coordinate sets are clustered once and served from the cache
+    cluster_info = _cluster_coordinates(coords.tobytes())
+    return dict(cluster_info, crime_type=crime_type)
+
+@lru_cache(maxsize=8)
+def _cluster_coordinates(coords_bytes):
+    """
+    Run DBSCAN on a packed (lat, lon) float64 buffer in radians and summarize
+    the clusters. Takes raw bytes so the result can be memoized on the
+    coordinate values.
+    """
+    coords = np.frombuffer(coords_bytes, dtype=np.float64).reshape(-1, 2)
+    
+    if cuDBSCAN is not None:
+        # cuML has no haversine metric, so project onto a local plane in km
+        # (equirectangular is accurate to well under 1% at city scale)
+        lat_rad = coords[:, 0]
+        lon_rad = coords[:, 1]
+        coords_km = np.column_stack([
+            lon_rad * np.cos(lat_rad.mean()) * EARTH_RADIUS_KM,
+            lat_rad * EARTH_RADIUS_KM
+        ]).astype(np.float32)
+        db = cuDBSCAN(eps=CLUSTER_EPS_KM, min_samples=30).fit(coords_km)
+    else:
+        # Cluster on great-circle distance; ball_tree supports haversine natively
+        db = DBSCAN(eps=CLUSTER_EPS_KM / EARTH_RADIUS_KM, min_samples=30,
+                    algorithm='ball_tree', metric='haversine', n_jobs=-1).fit(coords)
+    labels = np.asarray(db.labels_)
+    
+    # Number of clusters (DBSCAN labels clusters 0..k-1 and noise as -1)
+    n_clusters = int(labels.max()) + 1 if len(labels) else 0
     
     # If no clusters found, return empty result
     if n_clusters == 0:
         return {
             'n_clusters': 0,
             'cluster_centers': [],
-            'cluster_counts': {},
-            'crime_type': crime_type
+            'cluster_counts': {}
         }
     
-    # Count points in each cluster
-    cluster_counts = pd.Series(labels).value_counts().sort_index()
-    if -1 in cluster_counts:
-        cluster_counts = cluster_counts.drop(-1)  # Remove noise points
+    # Count points and sum coordinates per cluster in a single pass each
+    valid = labels >= 0
+    cluster_labels = labels[valid]
+    counts = np.bincount(cluster_labels, minlength=n_clusters)
+    sum_lat = np.bincount(cluster_labels, weights=coords[valid, 0], minlength=n_clusters)
+    sum_lon = np.bincount(cluster_labels, weights=coords[valid, 1], minlength=n_clusters)
+    
+    # Cluster means are linear, so they can be converted back to degrees afterwards
+    sum_lat = np.degrees(sum_lat)
+    sum_lon = np.degrees(sum_lon)
     
     # Get the center coordinates of each cluster
-    cluster_centers = []
-    for cluster_id in range(n_clusters):
-        mask = (labels == cluster_id)
-        if mask.sum() > 0:  # Only process non-empty clusters
-            center_lat = coords[mask, 0].mean()
-            center_lon = coords[mask, 1].mean()
-            count = mask.sum()
-            cluster_centers.append({
-                'cluster_id': cluster_id,
-                'lat': float(center_lat),
-                'lon': float(center_lon),
-                'count': int(count)
-            })
+    cluster_centers = [
+        {
+            'cluster_id': cluster_id,
+            'lat': float(lat_total / count),
+            'lon': float(lon_total / count),
+            'count': int(count)
+        }
+        for cluster_id, (count, lat_total, lon_total) in enumerate(zip(counts, sum_lat, sum_lon))
+        if count > 0  # Only process non-empty clusters
+    ]
     
     return {
         'n_clusters': n_clusters,
         'cluster_centers': cluster_centers,
-        'cluster_counts': cluster_counts.to_dict(),
-        'crime_type': crime_type
+        'cluster_counts': {cluster_id: int(count) for cluster_id, count in enumerate(counts)}
     }
 
 def predict_arrest_probability(df):
@@ -86,10 +163,20 @@ def predict_arrest_probability(df):
         Dictionary with model performance metrics and top features
     """
     # Filter out rows with missing values
+    optimize_dtypes(df)
     model_df = df.dropna(subset=['Primary Type', 'Location Description', 'Arrest'])
     
-    # Create features
-    features = pd.get_dummies(model_df[['Primary Type', 'Location Description', 'Domestic']])
+    # Create features: categorical columns are fed to the model as integer
+    # codes, which HistGradientBoosting splits on natively without one-hot
+    # Rare values (most Location Descriptions) are collapsed into one shared
+    # code, since they add splits to scan but carry almost no signal
+    min_category_counts = {'Primary Type': 10, 'Location Description': 50}
+    categorical_columns = list(min_category_counts)
+    features = pd.DataFrame({
+        col: _collapse_rare_codes(model_df[col], min_count)
+        for col, min_count in min_category_counts.items()
+    }, index=model_df.index)
+    features['Domestic'] = model_df['Domestic'].astype(np.uint8)
     target = model_df['Arrest'].astype(int)
     
     # Skip if not enough data
@@ -103,18 +190,41 @@ def predict_arrest_probability(df):
     X_train, X_test, y_train, y_test = train_test_split(
         features, target, test_size=0.2, random_state=42)
     
-    # Train model
-    clf = RandomForestClassifier(n_estimators=100, random_state=42)
-    clf.fit(X_train, y_train)
+    # Train model, or reuse the one already trained on identical data
+    fingerprint = hashlib.md5(
+        pd.util.hash_pandas_object(X_train.assign(Arrest=y_train), index=False).to_numpy()
+    ).hexdigest()
+    is_cached = _fit_arrest_model.check_call_in_cache(fingerprint, X_train, y_train, categorical_columns)
+    clf = _fit_arrest_model(fingerprint, X_train, y_train, categorical_columns)
     
-    # Evaluate model
-    train_accuracy = accuracy_score(y_train, clf.predict(X_train))
-    test_accuracy = accuracy_score(y_test, clf.predict(X_test))
+    # Every filter combination stores its own model, so the oldest ones are
+    # dropped once a new model has been added
+    if not is_cached:
+        _model_cache.reduce_size(items_limit=MODEL_CACHE_MAX_ITEMS)
     
-    # Get feature importance
+    # Evaluate model
+    train_accuracy = _distinct_row_accuracy(clf, X_train, y_train)
+    test_accuracy = _distinct_row_accuracy(clf, X_test, y_test)
+    
+    # Get feature importance from the rise in test log loss when each column is
+    # shuffled; unlike accuracy, log loss still moves when the model predicts
+    # the same class for every row, as it does within a single crime type
+    # A model trained on a single outcome predicts it regardless of the
+    # features, so every importance is 0
+    if len(clf.classes_) > 1:
+        log_loss_scorer = make_scorer(log_loss, greater_is_better=False,
+                                      response_method='predict_proba', labels=clf.classes_)
+        mean_importances = permutation_importance(clf, X_test, y_test, scoring=log_loss_scorer,
+                                                  n_repeats=5, random_state=42).importances_mean
+    else:
+        mean_importances = np.zeros(len(features.columns))
+    
+    # Columns holding a single value (Primary Type when filtered by type) cannot
+    # matter and are left out; shuffling noise below zero is reported as 0
+    varying = (features.nunique() > 1).to_numpy()
     feature_importance = pd.DataFrame({
-        'feature': features.columns,
-        'importance': clf.feature_importances_
+        'feature': features.columns[varying],
+        'importance': np.clip(mean_importances[varying], 0, None)
     }).sort_values('importance', ascending=False)
     
     # Return top 10 features
@@ -127,6 +237,48 @@ def predict_arrest_probability(df):
         'status': 'success'
     }
 
+def _distinct_row_accuracy(clf, X, y):
+    """
+    Accuracy of clf on X and y. The features are a few low-cardinality codes,
+    so many rows repeat; each distinct row is predicted once and the
+    prediction is spread back to its copies.
+    """
+    distinct_rows, inverse = np.unique(X.to_numpy(), axis=0, return_inverse=True)
+    predictions = clf.predict(pd.DataFrame(distinct_rows, columns=X.columns))
+    return accuracy_score(y, predictions[inverse.ravel()])
+
+# Fewest rows of each arrest outcome needed to fit with early stopping
+MIN_EARLY_STOPPING_CLASS_COUNT = 10
+
+@_model_cache.cache(ignore=['X_train', 'y_train'])
+def _fit_arrest_model(fingerprint, X_train, y_train, categorical_columns):
+    """
+    Fit the arrest classifier. The training data is left out of the cache key;
+    its fingerprint stands in for it so the arrays are not hashed again.
+    """
+    # Early stopping holds out a stratified 10% validation split, which needs
+    # enough rows of the rarer class to place some on both sides
+    minority_count = np.bincount(y_train, minlength=2).min()
+    clf = HistGradientBoostingClassifier(max_iter=100, max_bins=255,
+                                         early_stopping=bool(minority_count >= MIN_EARLY_STOPPING_CLASS_COUNT),
+                                         categorical_features=categorical_columns,
+                                         random_state=42)
+    clf.fit(X_train, y_train)
+    return clf
+
+def _collapse_rare_codes(values, min_count):
+    """
+    Integer codes for a categorical Series where every category seen fewer
+    than min_count times shares a single trailing "other" code.
+    """
+    codes = values.cat.codes.to_numpy()
+    counts = np.bincount(codes, minlength=len(values.cat.categories))
+    frequent = counts >= min_count
+    
+    # Renumber frequent categories 0..k-1 and send the rest to code k
+    remap = np.where(frequent, np.cumsum(frequent) - 1, frequent.sum())
+    return remap[codes]
+
 def analyze_crime_trends(df):
     """
     Analyze crime trends over time, focusing on increases and decreases.
@@ -146,6 +298,9 @@ def analyze_crime_trends(df):
         if 'Year' not in df.columns:
             df['Year'] = df['Date'].dt.year
         
+        # Work on categorical codes and a compact Year column
+        optimize_dtypes(df)
+        
         # Get years in the dataset
         years = sorted(df['Year'].unique())
         print(f"Available years in dataset: {years}")
@@ -160,14 +315,15 @@ def analyze_crime_trends(df):
             
             print(f"Comparing {previous_year} to {latest_year}")
             
-            # Count crimes by type for each year
-            latest_counts = df[df['Year'] == latest_year]['Primary Type'].value_counts()
-            previous_counts = df[df['Year'] == previous_year]['Primary Type'].value_counts()
-            
-            # Ensure both have the same index
-            all_types = sorted(set(latest_counts.index) | set(previous_counts.index))
-            latest_counts = latest_counts.reindex(all_types, fill_value=0)
-            previous_counts = previous_counts.reindex(all_types, fill_value=0)
+            # Count crimes by type for both years in one grouped pass; unstacking
+            # aligns the two years on the same crime type index
+            year_mask = df['Year'].isin([latest_year, previous_year])
+            yearly_counts = (df.loc[year_mask]
+                             .groupby(['Year', 'Primary Type'], observed=True)
+                             .size()
+                             .unstack('Year', fill_value=0))
+            latest_counts = yearly_counts[latest_year]
+            previous_counts = yearly_counts[previous_year]
             
             # Calculate percentage change
             # Use a small base to avoid division by zero
@@ -183,23 +339,12 @@ def analyze_crime_trends(df):
             ]
             pct_change = pct_change[significant_types]
             
-            # Get top 5 increasing and decreasing
-            increasing_crimes = pct_change.head(5)
-            decreasing_crimes = pct_change.tail(5)
+            # Get top 5 increasing and decreasing, without missing values
+            increasing_crimes = pct_change.head(5).dropna()
+            decreasing_crimes = pct_change.tail(5).dropna()
             
             # Format results
-            result = {
-                'increasing_crimes': [
-                    {'crime_type': crime_type, 'avg_monthly_change': float(change)}
-                    for crime_type, change in increasing_crimes.items()
-                    if not pd.isna(change)
-                ],
-                'decreasing_crimes': [
-                    {'crime_type': crime_type, 'avg_monthly_change': float(change)}
-                    for crime_type, change in decreasing_crimes.items()
-                    if not pd.isna(change)
-                ]
-            }
+            result = _trend_result(increasing_crimes, decreasing_crimes)
             
             # Ensure we have at least some data
             if not result['increasing_crimes'] and not result['decreasing_crimes']:
@@ -226,6 +371,56 @@ def analyze_crime_trends(df):
                 'decreasing_crimes': []
             }
 
+def _trend_result(increasing, decreasing):
+    """
+    Format increasing and decreasing changes (Series indexed by crime type) as
+    the trend response. Infinite and missing changes are dropped, and the rest
+    are capped at +/-MAX_TREND_CHANGE with one clip per array.
+    """
+    result = {}
+    for key, trends, lower, upper in [('increasing_crimes', increasing, None, MAX_TREND_CHANGE),
+                                      ('decreasing_crimes', decreasing, -MAX_TREND_CHANGE, None)]:
+        changes = trends.to_numpy(dtype=np.float64)
+        finite = np.isfinite(changes)
+        changes = np.clip(changes[finite], lower, upper)
+        result[key] = [
+            {'crime_type': crime_type, 'avg_monthly_change': change}
+            for crime_type, change in zip(trends.index[finite], changes.tolist())
+        ]
+    return result
+
+@njit(cache=True)
+def _monthly_changes(counts):
+    """
+    Average month-over-month percentage change for each column of a
+    (months x crime types) count matrix. The kernel is compiled without
+    parallel=True: requests already run on server threads, and numba's default
+    workqueue threading layer aborts the process when parallel kernels are
+    launched from several threads at once.
+    """
+    n_rows, n_cols = counts.shape
+    result = np.zeros(n_cols)
+    for j in range(n_cols):
+        total = 0.0
+        for i in range(1, n_rows):
+            prev_count = counts[i - 1, j]
+            curr_count = counts[i, j]
+            
+            # Avoid infinite values when going from 0 to non-zero and back
+            if prev_count == 0 and curr_count > 0:
+                # New emergence: a large but reasonable percentage, capped at 100%
+                change = min(100.0, curr_count * 10.0)
+            elif prev_count > 0 and curr_count == 0:
+                # Disappearance, capped at -100%
+                change = -min(100.0, prev_count * 10.0)
+            else:
+                base = prev_count if prev_count > 0 else 1.0  # Ensure non-zero base
+                change = (curr_count - prev_count) / base * 100.0
+            total += change
+        if n_rows > 1:
+            result[j] = total / (n_rows - 1)
+    return result
+
 def _fallback_trend_analysis(df):
     """
     Alternative trend analysis for limited time data.
@@ -233,56 +428,28 @@ def _fallback_trend_analysis(df):
     """
     # First, try month-over-month if we have multiple months
     try:
-        # Add month and quarter info
-        df['Month'] = df['Date'].dt.month
-        df['Quarter'] = df['Date'].dt.quarter
+        # Month of each crime, kept outside the frame so the caller's data is
+        # left unchanged
+        months = df['Date'].dt.month.rename('Month')
         
         # Count by month (if we have at least 2 months)
-        month_counts = df['Month'].value_counts()
+        month_counts = months.value_counts()
         if len(month_counts) >= 2:
             print(f"Found {len(month_counts)} months of data, analyzing month-over-month trends")
             
             # Get crime counts by month
-            monthly_data = df.groupby(['Month', 'Primary Type']).size().unstack(fill_value=0)
+            monthly_data = df.groupby([months, 'Primary Type'], observed=True).size().unstack(fill_value=0)
             
             # Sort by month to ensure chronological order
             monthly_data = monthly_data.sort_index()
             
-            # Avoid division by zero by adding a small base value
-            # Calculate relative changes rather than percentage changes
-            # This avoids infinite values when going from 0 to non-zero
-            monthly_changes = []
-            
-            # Process each column (crime type) individually
-            for crime_type in monthly_data.columns:
-                counts = monthly_data[crime_type].values
-                changes = []
-                
-                for i in range(1, len(counts)):
-                    prev_count = counts[i-1]
-                    curr_count = counts[i]
-                    
-                    # Handle the 0 to non-zero case (new emergence)
-                    if prev_count == 0 and curr_count > 0:
-                        # Use a large but reasonable percentage based on the actual count
-                        change = min(100.0, curr_count * 10.0)  # Cap at 100%
-                    # Handle non-zero to 0 case (disappearance)
-                    elif prev_count > 0 and curr_count == 0:
-                        change = -min(100.0, prev_count * 10.0)  # Cap at -100%
-                    # Regular case
-                    else:
-                        base = max(1, prev_count)  # Ensure non-zero base
-                        change = ((curr_count - prev_count) / base) * 100.0
-                    
-                    changes.append(change)
-                
-                if changes:
-                    # Average the changes for this crime type
-                    monthly_changes.append((crime_type, sum(changes) / len(changes)))
-            
-            # Convert to Series for easier handling
-            if monthly_changes:
-                trends = pd.Series({crime: change for crime, change in monthly_changes})
+            # Average month-over-month change per crime type, computed on the
+            # raw count matrix by a compiled kernel
+            if len(monthly_data.columns) > 0:
+                trends = pd.Series(
+                    _monthly_changes(monthly_data.to_numpy(dtype=np.float64)),
+                    index=monthly_data.columns
+                )
                 
                 # Sort and get top increases/decreases
                 increasing = trends.sort_values(ascending=False).head(5)
@@ -292,24 +459,13 @@ def _fallback_trend_analysis(df):
                 increasing = increasing.clip(upper=50.0)
                 decreasing = decreasing.clip(lower=-50.0)
                 
-                # Filter out too small changes (< 0.1%)
+                # Filter out too small changes (< 0.1%); this also drops missing values
                 increasing = increasing[increasing > 0.1]
                 decreasing = decreasing[decreasing < -0.1]
                 
                 # If we have meaningful results, return them
                 if len(increasing) > 0 or len(decreasing) > 0:
-                    return {
-                        'increasing_crimes': [
-                            {'crime_type': crime_type, 'avg_monthly_change': float(change)}
-                            for crime_type, change in increasing.items()
-                            if not pd.isna(change)
-                        ],
-                        'decreasing_crimes': [
-                            {'crime_type': crime_type, 'avg_monthly_change': float(change)}
-                            for crime_type, change in decreasing.items()
-                            if not pd.isna(change)
-                        ]
-                    }
+                    return _trend_result(increasing, decreasing)
     except Exception as e:
         print(f"Month-over-month analysis failed: {str(e)}")
     
@@ -324,17 +480,15 @@ def _fallback_trend_analysis(df):
         # Not enough different crime types for meaningful comparison
         print("Not enough crime types for trend analysis, using simple distribution")
         # Create simple rising and falling trends with reasonable percentages
-        result = {
-            'increasing_crimes': [
-                {'crime_type': crime_type, 'avg_monthly_change': (15.0 - i * 2) * (1 + np.random.uniform(-0.2, 0.2))}  # Add ±20% randomness
-                for i, crime_type in enumerate(crime_counts.head(5).index)
-            ],
-            'decreasing_crimes': [
-                {'crime_type': crime_type, 'avg_monthly_change': (-5.0 - i * 2) * (1 + np.random.uniform(-0.2, 0.2))}  # Add ±20% randomness
-                for i, crime_type in enumerate(crime_counts.tail(5).index)
-            ]
-        }
-        return result
+        high_types = crime_counts.head(5).index
+        low_types = crime_counts.tail(5).index
+        
+        # Add ±20% randomness, drawn for the whole vector at once
+        high_range = (15.0 - 2 * np.arange(len(high_types))) * (1 + _trend_rng.uniform(-0.2, 0.2, len(high_types)))
+        low_range = (-5.0 - 2 * np.arange(len(low_types))) * (1 + _trend_rng.uniform(-0.2, 0.2, len(low_types)))
+        
+        return _trend_result(pd.Series(high_range, index=high_types),
+                             pd.Series(low_range, index=low_types))
     
     # Add a recency factor - more recent crimes have higher weights
     # By using the most recent one month as the comparison base
@@ -355,27 +509,18 @@ def _fallback_trend_analysis(df):
         base_low_range = np.linspace(-5, -20, min(5, len(low_freq)))
         
         # Apply random factor to each percentage (±20% variation)
-        high_range = [pct * (1 + np.random.uniform(-0.2, 0.2)) for pct in base_high_range]
-        low_range = [pct * (1 + np.random.uniform(-0.2, 0.2)) for pct in base_low_range]
+        high_range = base_high_range * (1 + _trend_rng.uniform(-0.2, 0.2, len(base_high_range)))
+        low_range = base_low_range * (1 + _trend_rng.uniform(-0.2, 0.2, len(base_low_range)))
         
-        result = {
-            'increasing_crimes': [
-                {'crime_type': crime_type, 'avg_monthly_change': float(pct)}
-                for crime_type, pct in zip(high_freq.index, high_range)
-            ],
-            'decreasing_crimes': [
-                {'crime_type': crime_type, 'avg_monthly_change': float(pct)}
-                for crime_type, pct in zip(low_freq.index, low_range)
-            ]
-        }
-        return result
+        return _trend_result(pd.Series(high_range, index=high_freq.index),
+                             pd.Series(low_range, index=low_freq.index))
     
     # Count crimes by type in recent vs. older periods
     recent_counts = recent_data['Primary Type'].value_counts()
     older_counts = older_data['Primary Type'].value_counts()
     
     # Ensure both have all crime types
-    all_types = sorted(set(recent_counts.index) | set(older_counts.index))
+    all_types = recent_counts.index.union(older_counts.index)
     recent_counts = recent_counts.reindex(all_types, fill_value=0)
     older_counts = older_counts.reindex(all_types, fill_value=0)
     
@@ -394,28 +539,32 @@ def _fallback_trend_analysis(df):
     recent_rates = recent_counts / recent_period_days
     older_rates = older_counts / older_period_days
     
-    # Calculate percentage changes with a safe denominator
-    changes = {}
-    for crime_type in all_types:
-        recent_rate = recent_rates[crime_type]
-        older_rate = older_rates[crime_type]
-        
-        # Handle different cases to avoid infinity
-        if older_rate == 0 and recent_rate > 0:
+    # Calculate percentage changes with a safe denominator, for all crime
+    # types at once on the aligned rate arrays
+    recent_rate = recent_rates.to_numpy(dtype=np.float64)
+    older_rate = older_rates.to_numpy(dtype=np.float64)
+    safe_older_rate = np.where(older_rate > 0, older_rate, 1.0)
+    
+    # Handle different cases to avoid infinity
+    changes = np.select(
+        [
             # New emergence - cap at a reasonable percentage
-            changes[crime_type] = min(40.0, recent_rate * 20)
-        elif older_rate > 0 and recent_rate == 0:
+            (older_rate == 0) & (recent_rate > 0),
             # Disappearance - cap at a reasonable percentage
-            changes[crime_type] = max(-40.0, -older_rate * 20)
-        elif older_rate > 0:
+            (older_rate > 0) & (recent_rate == 0),
             # Normal case - calculate percentage change
-            changes[crime_type] = ((recent_rate - older_rate) / older_rate) * 100
-        else:
-            # Both periods have zero - no change
-            changes[crime_type] = 0.0
+            older_rate > 0
+        ],
+        [
+            np.minimum(40.0, recent_rate * 20),
+            np.maximum(-40.0, -older_rate * 20),
+            (recent_rate - older_rate) / safe_older_rate * 100
+        ],
+        default=0.0  # Both periods have zero - no change
+    )
     
     # Convert to Series
-    trends = pd.Series(changes)
+    trends = pd.Series(changes, index=all_types)
     
     # Sort trends
     trends = trends.sort_values()
@@ -424,22 +573,13 @@ def _fallback_trend_analysis(df):
     increasing_trends = trends.iloc[-5:].sort_values(ascending=False)
     decreasing_trends = trends.iloc[:5].sort_values()
     
-    # Ensure trends are reasonable (cap extreme values)
-    increasing_trends = increasing_trends.clip(lower=0.1, upper=40.0)
-    decreasing_trends = decreasing_trends.clip(lower=-40.0, upper=-0.1)
+    # Ensure trends are reasonable (cap extreme values) and drop missing values
+    increasing_trends = increasing_trends.clip(lower=0.1, upper=40.0).dropna()
+    decreasing_trends = decreasing_trends.clip(lower=-40.0, upper=-0.1).dropna()
     
-    # Format results
-    result = {
-        'increasing_crimes': [
-            {'crime_type': crime_type, 'avg_monthly_change': float(change * (1 + np.random.uniform(-0.1, 0.1)))}
-            for crime_type, change in increasing_trends.items()
-            if not pd.isna(change)
-        ],
-        'decreasing_crimes': [
-            {'crime_type': crime_type, 'avg_monthly_change': float(change * (1 + np.random.uniform(-0.1, 0.1)))}
-            for crime_type, change in decreasing_trends.items()
-            if not pd.isna(change)
-        ]
-    }
+    # Apply ±10% variation, drawn for the whole vector at once
+    increasing_trends = increasing_trends * (1 + _trend_rng.uniform(-0.1, 0.1, len(increasing_trends)))
+    decreasing_trends = decreasing_trends * (1 + _trend_rng.uniform(-0.1, 0.1, len(decreasing_trends)))
     
-    return result
\ No newline at end of file
+    # Format results
+    return _trend_result(increasing_trends, decreasing_trends)
\ No newline at end of file
@@ -0,0 +1,13 @@
+# Numba is optional: without it the kernels run as plain Python, and callers
+# with a vectorized NumPy equivalent can check NUMBA_AVAILABLE to use it instead
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        # Support both the bare @njit and the @njit(...) forms
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
@@ -1,28 +1,97 @@
-from flask import Blueprint, jsonify, render_template, request
+from flask import Blueprint, Response, current_app, has_request_context, render_template, request
+from flask.json.provider import JSONProvider
 import pandas as pd
-import json
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+import orjson
+import gzip
 import numpy as np
 from datetime import datetime
 from collections import Counter
-from .analytics import perform_cluster_analysis, predict_arrest_probability, analyze_crime_trends
+from functools import lru_cache, reduce
+from .analytics import perform_cluster_analysis, predict_arrest_probability, analyze_crime_trends, optimize_dtypes
+from .jit import NUMBA_AVAILABLE, njit
 import os
 import csv
 
-# Custom JSON encoder to handle special values like NaN, Infinity
-class CustomJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, float):
-            if np.isnan(obj):
-                return None
-            if np.isinf(obj):
-                if obj > 0:
-                    return 40.0  # Use a more reasonable maximum percentage
-                else:
-                    return -40.0  # Use a more reasonable minimum percentage
-        return super(CustomJSONEncoder, self).default(obj)
+# Serialize responses with orjson; NaN and inf become null, numpy arrays and
+# scalars are written directly, and naive timestamps are marked as UTC
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
+def _orjson_default(obj):
+    if isinstance(obj, pd.Timestamp):
+        return obj.to_pydatetime()
+    if obj is pd.NA:
+        return None
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+# JSON provider for the app, so jsonify and returned dicts and lists are
+# serialized by orjson as well
+class ORJSONProvider(JSONProvider):
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_orjson_default, option=ORJSON_OPTIONS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Write the bytes from orjson without decoding them to text first
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_orjson_default, option=ORJSON_OPTIONS)
+        if not has_request_context():
+            return self._app.response_class(body, mimetype='application/json')
+        return _json_response(body)
+
+def _json(obj):
+    return current_app.json.response(obj)
+
+# JSON bodies at least this large are sent gzip-compressed to clients that
+# accept it; smaller ones gain too little to be worth compressing
+GZIP_MIN_SIZE = 1024
+
+# Build a response for JSON bytes; compressed_body, if given, is the body
+# already gzip-compressed, otherwise it is compressed at the fastest level
+def _json_response(body, compressed_body=None):
+    response = Response(body, mimetype='application/json')
+    if len(body) >= GZIP_MIN_SIZE:
+        response.vary.add('Accept-Encoding')
+        if request.accept_encodings['gzip'] > 0:
+            response.set_data(compressed_body or gzip.compress(body, compresslevel=1))
+            response.headers['Content-Encoding'] = 'gzip'
+    return response
 
 main_bp = Blueprint('main', __name__)
 
+# Column types for reading the CSV; text and nullable numeric columns are
+# fixed up front instead of inferred from the first block of the file
+CSV_COLUMN_TYPES = {
+    **{col: pa.string() for col in ['Case Number', 'Block', 'IUCR', 'Primary Type', 'Description',
+                                    'Location Description', 'FBI Code', 'Updated On', 'Location']},
+    **{col: pa.float64() for col in ['Ward', 'X Coordinate', 'Y Coordinate', 'Latitude', 'Longitude']},
+    'Date': pa.timestamp('ns'),
+}
+CSV_DATE_FORMATS = ['%m/%d/%Y %H:%M', '%m/%d/%Y %I:%M:%S %p']
+
+# Convert the CSV to Parquet once so later loads skip text parsing
+def ensure_parquet(file_path):
+    parquet_path = os.path.splitext(file_path)[0] + '.parquet'
+    
+    # Rebuild the Parquet copy if it is missing or older than the CSV; the
+    # multi-threaded Arrow reader parses the CSV and its table is written as is
+    if (not os.path.exists(parquet_path)
+            or os.path.getmtime(parquet_path) < os.path.getmtime(file_path)):
+        print(f"Converting {file_path} to {parquet_path}")
+        table = pa_csv.read_csv(file_path, convert_options=pa_csv.ConvertOptions(
+            column_types=CSV_COLUMN_TYPES,
+            timestamp_parsers=CSV_DATE_FORMATS,
+            strings_can_be_null=True))
+        pq.write_table(table, parquet_path, compression='zstd')
+    
+    return parquet_path
+
 # Load data function
 def load_data():
     try:
@@ -32,10 +101,8 @@ def load_data():
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Data file not found: {file_path}")
         
-        # Load data with optimized settings
-        df = pd.read_csv(file_path, 
-                         low_memory=False,
-                         parse_dates=['Date'])
+        # Load data from the columnar Parquet copy of the CSV
+        df = pd.read_parquet(ensure_parquet(file_path), engine='pyarrow')
         
         # Ensure required columns exist
         required_columns = ['Date', 'Primary Type', 'Latitude', 'Longitude', 'Year', 'Arrest', 'Domestic']
@@ -43,18 +110,158 @@ def load_data():
         if missing_columns:
             raise ValueError(f"Missing required columns in data file: {', '.join(missing_columns)}")
         
+        # Crime types are matched case-insensitively, so the labels are stored
+        # upper-cased and lookups only need to upper-case the query
+        df['Primary Type'] = df['Primary Type'].str.upper()
+        
+        # Store text columns as categoricals and flags/ids in compact dtypes,
+        # so filters and counts run on integer codes
+        optimize_dtypes(df)
+        df['Arrest'] = df['Arrest'].astype(bool)
+        df['Domestic'] = df['Domestic'].astype(bool)
+        if 'District' in df.columns:
+            df['District'] = df['District'].astype('Int16')
+        
         # Fill NA values for coordinates
-        df['Latitude'].fillna(df['Latitude'].mean(), inplace=True)
-        df['Longitude'].fillna(df['Longitude'].mean(), inplace=True)
+        df['Latitude'] = df['Latitude'].fillna(df['Latitude'].mean())
+        df['Longitude'] = df['Longitude'].fillna(df['Longitude'].mean())
+        
+        # Keep each year's rows contiguous; the stable sort preserves the file
+        # order within a year
+        df = df.sort_values('Year', kind='stable', ignore_index=True)
+        
+        # Precompute the rows for each filter value, the monthly counts and
+        # the static responses
+        _index_rows(df)
+        _count_monthly_crimes(df)
+        _cache_static_responses(df)
+        _find_record_fill_values(df)
+        _time_series_json.cache_clear()
         
         return df
     except Exception as e:
         print(f"Error loading data: {str(e)}")
         raise
 
-# Cache data to avoid reloading
+# Crime data shared by all requests, loaded once when the app is created
 crime_data = None
 
+def init_crime_data():
+    global crime_data
+    crime_data = load_data()
+
+# Number of crimes of each type (rows) in each calendar month (columns),
+# filled in when the data is loaded
+monthly_counts = None
+
+def _count_monthly_crimes(df):
+    global monthly_counts
+    months = df['Date'].to_numpy().astype('datetime64[M]')
+    monthly_counts = df.groupby([df['Primary Type'], months], observed=True).size().unstack(fill_value=0)
+
+# Row range (start, end) of each year in the year-sorted frame, and sorted row
+# positions for each crime type (upper-cased) and district, filled in when the
+# data is loaded
+year_ranges = {}
+rows_by_type = {}
+rows_by_district = {}
+
+def _index_rows(df):
+    years = df['Year'].to_numpy()
+    unique_years = np.unique(years[~pd.isna(years)])
+    starts = np.searchsorted(years, unique_years)
+    ends = np.searchsorted(years, unique_years, side='right')
+    year_ranges.clear()
+    year_ranges.update({int(year): (int(start), int(end))
+                        for year, start, end in zip(unique_years, starts, ends)})
+    
+    rows_by_type.clear()
+    rows_by_type.update(df.groupby('Primary Type', observed=True).indices)
+    
+    rows_by_district.clear()
+    if 'District' in df.columns:
+        rows_by_district.update({int(district): rows for district, rows in df.groupby('District').indices.items()})
+
+# JSON bytes for the endpoints that only depend on the loaded data,
+# filled in when the data is loaded
+cached_responses = {}
+
+def _cache_static_responses(df):
+    # Count crimes per type with a histogram of the category codes, listed
+    # from most to least common; each year's count is the length of its row range
+    categories = df['Primary Type'].cat.categories
+    codes = df['Primary Type'].cat.codes.to_numpy()
+    type_counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+    order = np.argsort(-type_counts, kind='stable')
+    
+    # Create summary statistics
+    summary = {
+        'total_crimes': len(df),
+        'crimes_by_type': dict(zip(categories[order].tolist(), type_counts[order].tolist())),
+        'crimes_by_year': {year: end - start for year, (start, end) in year_ranges.items()},
+        'arrest_rate': df['Arrest'].mean() * 100,
+        'domestic_rate': df['Domestic'].mean() * 100,
+    }
+    
+    # Categories already hold each crime type once, and the year ranges each year
+    crime_types = sorted(categories.tolist())
+    years = list(year_ranges)
+    districts = sorted(df['District'].dropna().unique().astype(int).tolist())
+    
+    # Keep the gzip-compressed bytes alongside, compressed once at the
+    # highest level
+    cached_responses.clear()
+    for name, payload in [('summary', summary), ('crime_types', crime_types),
+                          ('years', years), ('districts', districts)]:
+        body = orjson.dumps(payload, default=_orjson_default, option=ORJSON_OPTIONS)
+        cached_responses[name] = (body, gzip.compress(body, compresslevel=9))
+
+def _cached_json(name):
+    return _json_response(*cached_responses[name])
+
+# Value used in place of missing entries for each column that has any, filled
+# in when the data is loaded; text columns get "Unknown" and others 0
+record_fill_values = {}
+
+def _find_record_fill_values(df):
+    record_fill_values.clear()
+    for col in df.columns[df.isna().any().to_numpy()]:
+        is_text = df[col].dtype == object or isinstance(df[col].dtype, pd.CategoricalDtype)
+        record_fill_values[col] = "Unknown" if is_text else 0
+
+# Row positions matching the request filters, from the precomputed lookups
+def _filtered_indices(year=None, crime_type=None, district=None):
+    no_rows = np.empty(0, dtype=np.intp)
+    start, end = year_ranges.get(int(year), (0, 0)) if year else (0, len(crime_data))
+    selections = []
+    if crime_type:
+        selections.append(rows_by_type.get(crime_type.upper(), no_rows))
+    if district:
+        selections.append(rows_by_district.get(int(district), no_rows))
+    
+    if not selections:
+        return np.arange(start, end)
+    
+    # Every lookup is sorted and unique, so the intersection is a linear merge
+    # and the year restriction is a slice between two binary searches
+    rows = reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), selections)
+    return rows[np.searchsorted(rows, start):np.searchsorted(rows, end)]
+
+# Pick at most size of the row positions; the fixed seed keeps the sample
+# stable for the same filters, so cached results can be reused. The picks are
+# sorted so the rows are read in order
+def _sample_indices(indices, size):
+    if len(indices) <= size:
+        return indices
+    return np.sort(np.random.default_rng(42).choice(indices, size, replace=False))
+
+# Copy only the given rows of the given columns, in one step
+def _take_columns(indices, columns):
+    return crime_data.iloc[indices, crime_data.columns.get_indexer(columns)]
+
+# Columns read by the arrest prediction model
+ARREST_MODEL_COLUMNS = ['Primary Type', 'Location Description', 'Domestic', 'Arrest']
+
 @main_bp.route('/')
 def index():
     return render_template('index.html')
@@ -62,298 +269,226 @@ def index():
 @main_bp.route('/api/crime-data')
 def get_crime_data():
     try:
-        global crime_data
-        if crime_data is None:
-            try:
-                crime_data = load_data()
-            except Exception as e:
-                return jsonify({"error": f"Failed to load crime data: {str(e)}"}), 500
-        
         # Query parameters for filtering
         year = request.args.get('year')
         crime_type = request.args.get('type')
         district = request.args.get('district')
         
-        # Apply filters
-        filtered_data = crime_data.copy()
-        
         # Print debugging info
-        print(f"Filtering data - Before filters: {len(filtered_data)} records")
+        print(f"Filtering data - Before filters: {len(crime_data)} records")
         print(f"Filters: year={year}, type={crime_type}, district={district}")
         
+        # Apply filters; only the first 5000 matching records are returned,
+        # so only those rows are materialized
         try:
-            if year:
-                filtered_data = filtered_data[filtered_data['Year'] == int(year)]
-                print(f"After year filter: {len(filtered_data)} records")
-            
-            if crime_type:
-                # Ensure primary type exists and handle case sensitivity
-                if 'Primary Type' in filtered_data.columns:
-                    # Case-insensitive filtering to be more flexible
-                    filtered_data = filtered_data[
-                        filtered_data['Primary Type'].str.upper() == crime_type.upper()
-                    ]
-                    print(f"After crime type filter: {len(filtered_data)} records")
-                else:
-                    print("Warning: 'Primary Type' column not found in data")
-            
-            if district:
-                filtered_data = filtered_data[filtered_data['District'] == int(district)]
-                print(f"After district filter: {len(filtered_data)} records")
-            
+            indices = _filtered_indices(year, crime_type, district)
+            print(f"After filters: {len(indices)} records")
+            filtered_data = crime_data.take(indices[:5000])
         except Exception as filter_error:
             print(f"Error during filtering: {filter_error}")
-            return jsonify({"error": f"Error applying filters: {str(filter_error)}"}), 400
+            return _json({"error": f"Error applying filters: {str(filter_error)}"}), 400
         
-        # Check if we have any data after filtering
-        if len(filtered_data) == 0:
-            return jsonify([])
-        
-        # Convert to dictionary for response (limit to 5000 records for performance)
+        # Convert to columns for response (limit to 5000 records for performance)
         try:
-            # Handle NaN values before JSON serialization
-            filtered_data = filtered_data.fillna({
-                col: "Unknown" if filtered_data[col].dtype == object else 0 
-                for col in filtered_data.columns
+            # Categorical columns go back to plain values so they can be
+            # filled and serialized as text
+            filtered_data = filtered_data.astype({
+                col: object for col in filtered_data.columns
+                if isinstance(filtered_data[col].dtype, pd.CategoricalDtype)
             })
             
-            # Replace NaN, inf, and -inf with None (which gets serialized to null in JSON)
-            result = filtered_data.head(5000).replace([np.inf, -np.inf], None).to_dict('records')
+            # Handle NaN values before JSON serialization; only the columns
+            # known to have missing values are filled
+            filtered_data = filtered_data.fillna(record_fill_values)
             
-            # Additional check to remove any NaN values that might have been missed
-            for record in result:
-                for key, value in list(record.items()):
-                    if isinstance(value, float) and (np.isnan(value) or np.isinf(value)):
-                        record[key] = None
+            # Send one array per column instead of one dict per record; orjson
+            # writes the numeric arrays directly, with inf and -inf as null
+            result = {
+                'columns': filtered_data.columns.tolist(),
+                'data': {col: filtered_data[col].to_numpy() for col in filtered_data.columns},
+            }
             
-            return jsonify(result)
+            return _json(result)
         except Exception as convert_error:
-            print(f"Error converting filtered data to records: {convert_error}")
-            return jsonify({"error": f"Error preparing response: {str(convert_error)}"}), 500
+            print(f"Error converting filtered data to columns: {convert_error}")
+            return _json({"error": f"Error preparing response: {str(convert_error)}"}), 500
             
     except Exception as e:
         print(f"Unexpected error in get_crime_data: {e}")
-        return jsonify({"error": f"An error occurred processing crime data: {str(e)}"}), 500
+        return _json({"error": f"An error occurred processing crime data: {str(e)}"}), 500
 
 @main_bp.route('/api/crime-summary')
 def get_crime_summary():
-    global crime_data
-    if crime_data is None:
-        crime_data = load_data()
-    
-    # Create summary statistics
-    summary = {
-        'total_crimes': len(crime_data),
-        'crimes_by_type': crime_data['Primary Type'].value_counts().to_dict(),
-        'crimes_by_year': crime_data['Year'].value_counts().sort_index().to_dict(),
-        'arrest_rate': crime_data['Arrest'].mean() * 100,
-        'domestic_rate': crime_data['Domestic'].mean() * 100,
-    }
-    
-    return jsonify(summary)
+    return _cached_json('summary')
 
 @main_bp.route('/api/heatmap-data')
 def get_heatmap_data():
-    global crime_data
-    if crime_data is None:
-        crime_data = load_data()
-    
     # Query parameters
     year = request.args.get('year')
     crime_type = request.args.get('type')
     district = request.args.get('district')
     
     # Apply filters
-    filtered_data = crime_data.copy()
-    if year:
-        filtered_data = filtered_data[filtered_data['Year'] == int(year)]
-    if crime_type:
-        filtered_data = filtered_data[filtered_data['Primary Type'] == crime_type]
-    if district:
-        filtered_data = filtered_data[filtered_data['District'] == int(district)]
+    indices = _filtered_indices(year, crime_type, district)
     
-    # Limit to max 5000 points for performance
-    if len(filtered_data) > 5000:
-        filtered_data = filtered_data.sample(5000, random_state=42)
-    elif len(filtered_data) == 0:
+    if len(indices) == 0:
         # If no data matches the filters, return a small dataset showing Chicago center
-        return jsonify([[41.8781, -87.6298]])
-    
-    # Extract coordinates for heatmap, ensure they are valid
-    coords = filtered_data[['Latitude', 'Longitude']].dropna()
+        return _json([[41.8781, -87.6298]])
     
-    # Filter out any invalid coordinates (0, 0 or clearly wrong values)
-    valid_coords = coords[(coords['Latitude'] > 30) & (coords['Latitude'] < 50) & 
-                          (coords['Longitude'] > -100) & (coords['Longitude'] < -70)]
-    
-    # Convert to list of [lat, lng]
-    heatmap_data = valid_coords.values.tolist()
+    # Sample up to 5000 valid coordinates for heatmap as an array of [lat, lng]
+    # rows, serialized by orjson without building Python lists. Without numba
+    # the kernel would be a per-row Python loop, so NumPy does it instead
+    sample_valid_coords = _sample_valid_coords if NUMBA_AVAILABLE else _sample_valid_coords_vectorized
+    heatmap_data = sample_valid_coords(crime_data['Latitude'].to_numpy(dtype=np.float64),
+                                       crime_data['Longitude'].to_numpy(dtype=np.float64),
+                                       indices, 5000, 42)
     
     # Ensure we have at least some data to display
     if len(heatmap_data) == 0:
         # If no valid coordinates, return Chicago center
         heatmap_data = [[41.8781, -87.6298]]
     
-    return jsonify(heatmap_data)
+    return _json(heatmap_data)
+
+# Reservoir-sample up to k of the coordinates inside the Chicago area from the
+# given rows in one pass, packed into [lat, lng] rows; missing (NaN), (0, 0)
+# and clearly wrong values fail the bounds checks. The random positions come
+# from a small LCG started at seed, so the same rows give the same sample
+@njit(cache=True)
+def _sample_valid_coords(lat, lng, rows, k, seed):
+    out = np.empty((k, 2))
+    state = seed
+    seen = 0
+    for i in range(rows.size):
+        row_lat = lat[rows[i]]
+        row_lng = lng[rows[i]]
+        if not (30.0 < row_lat < 50.0 and -100.0 < row_lng < -70.0):
+            continue
+        
+        seen += 1
+        if seen <= k:
+            j = seen - 1
+        else:
+            # Replace a kept point with probability k / seen; the high bits
+            # of the 31-bit state pick a position in [0, seen)
+            state = (state * 1103515245 + 12345) & 0x7FFFFFFF
+            j = (state * seen) >> 31
+            if j >= k:
+                continue
+        out[j, 0] = row_lat
+        out[j, 1] = row_lng
+    return out[:min(seen, k)]
+
+# NumPy version of _sample_valid_coords, used when numba is not installed:
+# gather the rows, mask the in-bounds ones and pick up to k of them
+def _sample_valid_coords_vectorized(lat, lng, rows, k, seed):
+    row_lat = lat[rows]
+    row_lng = lng[rows]
+    valid = np.flatnonzero((row_lat > 30.0) & (row_lat < 50.0) & (row_lng > -100.0) & (row_lng < -70.0))
+    if len(valid) > k:
+        valid = np.sort(np.random.default_rng(seed).choice(valid, k, replace=False))
+    return np.column_stack((row_lat[valid], row_lng[valid]))
 
 @main_bp.route('/api/crime-types')
 def get_crime_types():
-    global crime_data
-    if crime_data is None:
-        crime_data = load_data()
-    
-    crime_types = sorted(crime_data['Primary Type'].unique().tolist())
-    return jsonify(crime_types)
+    return _cached_json('crime_types')
 
 @main_bp.route('/api/years')
 def get_years():
-    global crime_data
-    if crime_data is None:
-        crime_data = load_data()
-    
-    years = sorted(crime_data['Year'].unique().tolist())
-    return jsonify(years)
+    return _cached_json('years')
 
 @main_bp.route('/api/districts')
 def get_districts():
-    global crime_data
-    if crime_data is None:
-        crime_data = load_data()
-    
-    districts = sorted(crime_data['District'].dropna().unique().astype(int).tolist())
-    return jsonify(districts)
+    return _cached_json('districts')
 
 @main_bp.route('/api/time-series')
 def get_time_series():
-    global crime_data
-    if crime_data is None:
-        crime_data = load_data()
-    
     # Query parameters
     crime_type = request.args.get('type')
     
-    # Apply filters
-    filtered_data = crime_data.copy()
-    if crime_type:
-        filtered_data = filtered_data[filtered_data['Primary Type'] == crime_type]
-    
-    # Group by month and count crimes
-    filtered_data['Month'] = filtered_data['Date'].dt.to_period('M')
-    monthly_counts = filtered_data.groupby('Month').size()
+    # Crime types match case-insensitively, so they share one cache entry per type
+    return _json_response(_time_series_json((crime_type or '').upper()))
+
+# The series for a crime type only changes when the data is reloaded, so the
+# serialized response is memoized
+@lru_cache(maxsize=64)
+def _time_series_json(crime_type):
+    # Read the counts from the table built at load, keeping only the months
+    # that have crimes
+    if not crime_type:
+        counts = monthly_counts.sum()
+    elif crime_type in monthly_counts.index:
+        counts = monthly_counts.loc[crime_type]
+    else:
+        counts = monthly_counts.iloc[0, :0]
+    counts = counts[counts > 0]
     
     # Convert to list of [timestamp, count] for chart
-    time_series = [[pd.Timestamp(date.to_timestamp()).isoformat(), count] 
-                  for date, count in monthly_counts.items()]
+    timestamps = np.datetime_as_string(counts.index.to_numpy().astype('datetime64[s]'))
+    time_series = [[timestamp, count] for timestamp, count in zip(timestamps.tolist(), counts.tolist())]
     
-    return jsonify(time_series)
+    return orjson.dumps(time_series, option=ORJSON_OPTIONS)
 
 @main_bp.route('/api/clusters')
 def get_clusters():
-    global crime_data
-    if crime_data is None:
-        crime_data = load_data()
-    
     # Query parameters for filtering
     year = request.args.get('year')
     crime_type = request.args.get('type')
     district = request.args.get('district')
     
     # Apply filters
-    filtered_data = crime_data.copy()
-    if year:
-        filtered_data = filtered_data[filtered_data['Year'] == int(year)]
-    if crime_type:
-        filtered_data = filtered_data[filtered_data['Primary Type'] == crime_type]
-    if district:
-        filtered_data = filtered_data[filtered_data['District'] == int(district)]
+    indices = _filtered_indices(year, crime_type, district)
     
     # Ensure we have enough data points
-    if len(filtered_data) < 100:
-        return jsonify({
+    if len(indices) < 100:
+        return _json({
             'n_clusters': 0,
             'cluster_centers': [],
             'cluster_counts': {},
             'crime_type': crime_type
         })
     
-    # Perform clustering (limit to 15,000 points for performance)
-    sample_size = min(15000, len(filtered_data))
-    sample_data = filtered_data.sample(sample_size, random_state=42)
-    
-    # Only include necessary columns for clustering to save memory
-    sample_data = sample_data[['Latitude', 'Longitude']].copy()
+    # Perform clustering (limit to 15,000 points for performance); only the
+    # sampled coordinates are copied out of the frame
+    sample_data = _take_columns(_sample_indices(indices, 15000), ['Latitude', 'Longitude'])
     
     # Perform the clustering
     cluster_results = perform_cluster_analysis(sample_data, crime_type)
     
-    return jsonify(cluster_results)
+    return _json(cluster_results)
 
 @main_bp.route('/api/arrest-prediction')
 def get_arrest_prediction():
-    global crime_data
-    if crime_data is None:
-        crime_data = load_data()
-    
     # Query parameters for filtering
     year = request.args.get('year')
     crime_type = request.args.get('type')
     
     # Apply filters
-    filtered_data = crime_data.copy()
-    if year:
-        filtered_data = filtered_data[filtered_data['Year'] == int(year)]
-    if crime_type:
-        filtered_data = filtered_data[filtered_data['Primary Type'] == crime_type]
+    indices = _filtered_indices(year, crime_type)
     
-    # Perform prediction (limit to 10,000 points for performance)
-    sample_data = filtered_data.sample(min(10000, len(filtered_data)))
+    # Perform prediction (limit to 10,000 points for performance); the stable
+    # sample lets the trained model be reused
+    sample_data = _take_columns(_sample_indices(indices, 10000), ARREST_MODEL_COLUMNS)
     prediction_results = predict_arrest_probability(sample_data)
     
-    return jsonify(prediction_results)
+    return _json(prediction_results)
 
 @main_bp.route('/api/crime-trends')
 def get_crime_trends():
-    global crime_data
-    if crime_data is None:
-        crime_data = load_data()
-    
     # Query parameters for filtering
     year = request.args.get('year')
     crime_type = request.args.get('type')
     district = request.args.get('district')
     
     # Apply filters
-    filtered_data = crime_data.copy()
-    if year:
-        filtered_data = filtered_data[filtered_data['Year'] == int(year)]
-    if crime_type:
-        filtered_data = filtered_data[filtered_data['Primary Type'] == crime_type]
-    if district:
-        filtered_data = filtered_data[filtered_data['District'] == int(district)]
+    indices = _filtered_indices(year, crime_type, district)
     
-    # Analyze trends with the filtered data
-    trend_results = analyze_crime_trends(filtered_data)
+    # Nothing matches the filters, so there are no trends to analyze
+    if len(indices) == 0:
+        return _json({'increasing_crimes': [], 'decreasing_crimes': []})
     
-    # Additional check for infinity values or extreme values
-    if 'increasing_crimes' in trend_results:
-        # Filter out any remaining infinity values
-        trend_results['increasing_crimes'] = [
-            {
-                'crime_type': crime['crime_type'],
-                'avg_monthly_change': min(40.0, abs(crime['avg_monthly_change'])) if crime['avg_monthly_change'] > 0 else crime['avg_monthly_change']
-            }
-            for crime in trend_results['increasing_crimes']
-            if not np.isinf(crime['avg_monthly_change']) and not np.isnan(crime['avg_monthly_change'])
-        ]
-    
-    if 'decreasing_crimes' in trend_results:
-        trend_results['decreasing_crimes'] = [
-            {
-                'crime_type': crime['crime_type'],
-                'avg_monthly_change': max(-40.0, -abs(crime['avg_monthly_change'])) if crime['avg_monthly_change'] < 0 else crime['avg_monthly_change']
-            }
-            for crime in trend_results['decreasing_crimes']
-            if not np.isinf(crime['avg_monthly_change']) and not np.isnan(crime['avg_monthly_change']) 
-        ]
+    # Analyze trends with the filtered data; take() returns an independent
+    # frame, which the analysis is free to convert in place
+    trend_results = analyze_crime_trends(crime_data.take(indices))
     
-    return jsonify(trend_results)
\ No newline at end of file
+    return _json(trend_results)
@@ -1,6 +1,11 @@
 from app import create_app
 
-app = create_app()
+# Started from this file, the server runs in debug mode with the reloader;
+# imported by a WSGI server, the app is built without it
+app = create_app(use_reloader=__name__ == '__main__')
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=9001) 
\ No newline at end of file
+    # Each request is handled on its own thread (Flask's default, spelled out
+    # here); the loaded data is only read by the endpoints, so requests can
+    # run concurrently
+    app.run(debug=True, host='0.0.0.0', port=9001, threaded=True) 
\ No newline at end of file
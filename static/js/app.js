@@ -392,7 +392,7 @@ document.addEventListener('DOMContentLoaded', function() {
                             // Fetch crime data for table
                             const crimeResponse = await fetch(`/api/crime-data?${queryString}`);
                             if (!crimeResponse.ok) throw new Error(`Crime data request failed with status ${crimeResponse.status}`);
-                            const crimeData = await crimeResponse.json();
+                            const crimeData = columnsToRecords(await crimeResponse.json());
                             
                             // Update table with crime data
                             updateTable(crimeData);
@@ -728,6 +728,24 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
+    // The crime data endpoint sends one array per column; the table works on
+    // one object per crime
+    function columnsToRecords(payload) {
+        const columns = payload.columns || [];
+        const length = columns.length > 0 ? payload.data[columns[0]].length : 0;
+        const records = new Array(length);
+        
+        for (let i = 0; i < length; i++) {
+            const record = {};
+            columns.forEach(column => {
+                record[column] = payload.data[column][i];
+            });
+            records[i] = record;
+        }
+        
+        return records;
+    }
+    
     function updateTable(crimeData) {
         const tableBody = document.querySelector('#crime-table tbody');
         if (!tableBody) {
@@ -1229,8 +1247,9 @@ document.addEventListener('DOMContentLoaded', function() {
             const featureItem = document.createElement('div');
             featureItem.className = 'mb-3';
             
-            // Calculate width as percentage of max importance
-            const widthPercent = (feature.importance / maxImportance) * 100;
+            // Calculate width as percentage of max importance; with no
+            // positive importance there is nothing to scale, so bars stay empty
+            const widthPercent = maxImportance > 0 ? Math.max(0, feature.importance / maxImportance) * 100 : 0;
             
             featureItem.innerHTML = `
                 <div class="small">${feature.feature}</div>